@@ -15,10 +15,12 @@
 """
 
 from datetime import datetime
+from app.services.change_feed import ChangeFeed
 from app.services.inventory_service import InventoryService
 from app.services.order_service import OrderService
 from app.services.payment_service import PaymentService
 from app.services.subscription_service import SubscriptionService
+from app.utils.money import Amount, format_cents, sum_cents
 
 
 class IMSApi:
@@ -27,16 +29,25 @@ class IMSApi:
     Handles all business workflows by delegating to service modules.
     """
 
-    def __init__(self):
+    def __init__(self, recorder=None):
         """
         Initialize all service instances.
         Each service has its own business logic and internal data store.
+        All of them publish state changes to one shared change feed.
+
+        An optional TrafficRecorder (app/api/traffic_replay.py) captures
+        every endpoint call for later replay.
         """
-        self.inventory_service = InventoryService()
-        self.order_service = OrderService(self.inventory_service)
-        self.payment_service = PaymentService()
+        self.change_feed = ChangeFeed()
+        self.inventory_service = InventoryService(self.change_feed)
+        self.order_service = OrderService(self.inventory_service, self.change_feed)
+        self.payment_service = PaymentService(self.change_feed)
         self.subscription_service = SubscriptionService()
 
+        self.recorder = recorder
+        if recorder is not None:
+            recorder.attach(self)
+
     # Inventory API Simulation
     def add_stock(self, variant_id: int, qty: int):
         """
@@ -44,7 +55,7 @@ class IMSApi:
         This simulates an API endpoint:
             POST /inventory/add
         """
-        new_qty = self.inventory_service.adjust_stock(variant_id, qty)
+        new_qty = self.inventory_service.adjust_stock(variant_id, qty, reason="receive")
         print(f"[Inventory] Variant {variant_id} stock adjusted to {new_qty}")
         return {"variant_id": variant_id, "new_qty": new_qty}
 
@@ -56,6 +67,14 @@ class IMSApi:
         print(f"[Inventory] Variant {variant_id} stock adjusted to {new_qty}")
         return {"variant_id": variant_id, "new_qty": new_qty}
 
+    def stock_as_of(self, variant_id: int, at: datetime):
+        """
+        Look up historical stock for audits and forecasting.
+            GET /inventory/<variant_id>?as_of=<timestamp>
+        """
+        qty = self.inventory_service.get_stock_as_of(variant_id, at)
+        return {"variant_id": variant_id, "as_of": at.isoformat(), "qty": qty}
+
     # Order API Simulation
     def create_order(self, tenant_id: int, items: list):
         """
@@ -65,23 +84,74 @@ class IMSApi:
         """
         order = self.order_service.create_order(tenant_id, items)
         print(f"[Order Created] ID={order.id}")
-        return {"order_id": order.id, "tenant_id": tenant_id, "status": order.status}
+        return {
+            "order_id": order.id,
+            "tenant_id": tenant_id,
+            "status": order.status,
+            "total": format_cents(order.total_cents)
+        }
+
+    def bulk_cancel_orders(self, tenant_id: int = None, start: datetime = None, end: datetime = None,
+                           refund: bool = True):
+        """
+        Cancel every CREATED order for a tenant and/or creation window,
+        restore their stock in one pass, and optionally refund their payments.
+        Intended for fraud sweeps and tenant offboarding:
+            POST /orders/bulk-cancel
+        """
+        if tenant_id is None and start is None and end is None:
+            raise ValueError("Bulk cancel requires a tenant_id or a time window.")
+
+        orders = self.order_service.find_orders(tenant_id=tenant_id, start=start, end=end, status="CREATED")
+        cancelled, restored = self.order_service.cancel_orders([order.id for order in orders])
+        # Report and refund only what was actually cancelled
+        order_ids = [order.id for order in cancelled]
+
+        refunded = []
+        if refund and order_ids:
+            payments = self.payment_service.find_completed_for_orders(order_ids)
+            refunded = self.payment_service.refund_payments(p.id for p in payments)
+        refunded_total = format_cents(sum_cents(p.amount_cents for p in refunded))
+
+        print(
+            f"[Bulk Cancel] {len(order_ids)} orders cancelled, "
+            f"{len(refunded)} payments refunded ({refunded_total} USD)"
+        )
+        return {
+            "cancelled_order_ids": order_ids,
+            "restored_stock": restored,
+            "refunded_payment_ids": [p.id for p in refunded],
+            "refunded_total": refunded_total
+        }
+
     # Payment API Simulation
-    def pay_order(self, tenant_id: int, order_id: int, amount: float, method: str = "cash"):
+    def pay_order(self, tenant_id: int, order_id: int, amount: Amount, method: str = "cash"):
         """
         Record a payment for an order.
         In a real system, this could connect to Stripe, Alipay, etc.
+        Amounts are returned as exact decimal strings (e.g. "199.80").
         """
         payment = self.payment_service.pay_order(tenant_id, order_id, amount, method)
-        print(f"[Payment Completed] Order {order_id} paid {amount} USD via {method}")
+        amount_str = format_cents(payment.amount_cents)
+        print(f"[Payment Completed] Order {order_id} paid {amount_str} USD via {method}")
         return {
             "payment_id": payment.id,
             "order_id": order_id,
-            "amount": payment.amount,
+            "amount": amount_str,
             "method": payment.method,
             "status": payment.status
         }
 
+    # Change Feed API Simulation
+    def subscribe_changes(self, from_seq: int = None, max_lag: int = 1000, policy: str = "drop"):
+        """
+        Tail the change feed of inventory, order and payment events.
+        Similar to a streaming endpoint:
+            GET /changes?from=<seq>
+        The returned subscription must be close()d (or used in a with-block).
+        """
+        return self.change_feed.subscribe(from_seq=from_seq, max_lag=max_lag, policy=policy)
+
     # Subscription API Simulation
     def renew_subscription(self, tenant_id: int, plan: str = "monthly"):
         """
@@ -0,0 +1,332 @@
+"""
+app/api/traffic_replay.py
+Record-and-replay of IMSApi traffic for performance regression testing.
+
+TrafficRecorder captures every endpoint call (method, arguments, start
+offset, duration, error) into a compact JSON-lines trace, gzip-compressed
+when the file name ends in ".gz". TrafficReplayer replays a trace against a
+fresh IMSApi at original speed, faster, or concurrently, then checks that
+the final state matches and reports throughput and latency deltas.
+
+Datetime arguments (e.g. bulk_cancel_orders windows) are stored as offsets
+from the recorder's start. On replay each one is placed at the same distance
+from its call as it was when recorded, so windows still cover the orders the
+replay itself created.
+"""
+
+import contextlib
+import gzip
+import io
+import json
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Dict, List, Optional
+
+# Public IMSApi methods that make up the traffic
+RECORDED_ENDPOINTS = (
+    "add_stock",
+    "reduce_stock",
+    "stock_as_of",
+    "create_order",
+    "bulk_cancel_orders",
+    "pay_order",
+    "renew_subscription",
+)
+
+
+class _TraceTime:
+    """A recorded datetime argument, as seconds from the recorder's start."""
+
+    def __init__(self, offset: float):
+        self.offset = offset
+
+    def resolve(self, call_offset: float) -> datetime:
+        """Shift to replay time, keeping the recorded distance from the call."""
+        return datetime.now() + timedelta(seconds=self.offset - call_offset)
+
+
+def _decode(obj: Dict):
+    if "$dt" in obj:
+        return _TraceTime(obj["$dt"])
+    if "$dec" in obj:
+        return Decimal(obj["$dec"])
+    return obj
+
+
+def _resolve(value, call_offset: float):
+    """Replace _TraceTime markers inside call arguments with replay-time datetimes."""
+    if isinstance(value, _TraceTime):
+        return value.resolve(call_offset)
+    if isinstance(value, list):
+        return [_resolve(v, call_offset) for v in value]
+    if isinstance(value, dict):
+        return {k: _resolve(v, call_offset) for k, v in value.items()}
+    return value
+
+
+def _open(path: str, mode: str):
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+def snapshot_state(api) -> Dict:
+    """
+    Capture the comparable business state of an IMSApi instance.
+    Timestamps are left out because they always differ between runs.
+    """
+    return {
+        "stock": {str(v): item.stock for v, item in sorted(api.inventory_service.items.items())},
+        "orders": [
+            [o.id, o.tenant_id, o.status, o.total_cents]
+            for o in sorted(api.order_service.orders.values(), key=lambda o: o.id)
+        ],
+        "payments": [
+            [p.id, p.order_id, p.status, p.amount_cents]
+            for p in sorted(api.payment_service.payments.values(), key=lambda p: p.id)
+        ],
+        "subscriptions": {
+            str(t): s.plan for t, s in sorted(api.subscription_service.subscriptions.items())
+        },
+    }
+
+
+def _aggregates(state: Dict) -> Dict:
+    """Order-independent summary of a snapshot (ignores order and payment ids)."""
+    return {
+        "stock": state["stock"],
+        "orders": sorted((tenant, status, total) for _, tenant, status, total in state["orders"]),
+        "payments": sorted((status, amount) for _, _, status, amount in state["payments"]),
+        "subscriptions": state["subscriptions"],
+    }
+
+
+def _latency_stats(durations: List[float]) -> Dict:
+    if not durations:
+        return {"calls": 0, "mean_ms": 0.0, "p50_ms": 0.0, "p95_ms": 0.0}
+    ordered = sorted(durations)
+    return {
+        "calls": len(ordered),
+        "mean_ms": statistics.fmean(ordered) * 1000,
+        "p50_ms": ordered[len(ordered) // 2] * 1000,
+        "p95_ms": ordered[min(int(len(ordered) * 0.95), len(ordered) - 1)] * 1000,
+    }
+
+
+class TrafficRecorder:
+    """
+    Captures IMSApi calls into a trace file.
+
+    Usage:
+        recorder = TrafficRecorder("traffic.jsonl.gz")
+        api = IMSApi(recorder=recorder)
+        ...
+        recorder.close(api)   # also stores the final state for verification
+
+    Recording never changes API behaviour: calls whose arguments cannot be
+    serialized are counted in `failed` instead of raising, and close()
+    detaches the wrappers from every attached IMSApi.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = _open(path, "w")
+        self._lock = threading.Lock()
+        self._started = time.perf_counter()
+        self._wall_started = datetime.now()
+        self._attached = []
+        self.closed = False
+        self.calls = 0
+        self.failed = 0
+
+    def __repr__(self):
+        return f"<TrafficRecorder path={self.path}, calls={self.calls}, failed={self.failed}>"
+
+    def attach(self, api):
+        """Wrap the recorded endpoints of an IMSApi instance."""
+        for name in RECORDED_ENDPOINTS:
+            setattr(api, name, self._wrap(name, getattr(api, name)))
+        self._attached.append(api)
+
+    def detach(self, api):
+        """Restore the original endpoints of an IMSApi instance."""
+        for name in RECORDED_ENDPOINTS:
+            api.__dict__.pop(name, None)
+        if getattr(api, "recorder", None) is self:
+            api.recorder = None
+        if api in self._attached:
+            self._attached.remove(api)
+
+    def _wrap(self, name: str, method):
+        def recorded(*args, **kwargs):
+            offset = time.perf_counter() - self._started
+            error = None
+            start = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+                raise
+            finally:
+                self._write({
+                    "t": round(offset, 6),
+                    "m": name,
+                    "a": list(args),
+                    "k": kwargs,
+                    "d": round(time.perf_counter() - start, 6),
+                    "e": error,
+                })
+        recorded.__name__ = name
+        recorded.__doc__ = method.__doc__
+        return recorded
+
+    def _write(self, entry: Dict):
+        try:
+            line = json.dumps(entry, default=self._encode, separators=(",", ":"))
+        except (TypeError, ValueError):
+            with self._lock:
+                self.failed += 1
+            return
+        with self._lock:
+            if self.closed:
+                return
+            self._file.write(line + "\n")
+            if "m" in entry:
+                self.calls += 1
+
+    def _encode(self, value):
+        """JSON encoder hook for argument types the endpoints accept."""
+        if isinstance(value, datetime):
+            return {"$dt": round((value - self._wall_started).total_seconds(), 6)}
+        if isinstance(value, Decimal):
+            return {"$dec": str(value)}
+        raise TypeError(f"Cannot record argument of type {type(value).__name__}")
+
+    def close(self, api=None):
+        """Finish the trace, optionally storing the final state of `api`."""
+        for attached in list(self._attached):
+            self.detach(attached)
+        if api is not None:
+            self._write({"state": snapshot_state(api)})
+        with self._lock:
+            self.closed = True
+            self._file.close()
+        print(f"[TrafficRecorder] Saved {self.calls} calls to {self.path} ({self.failed} not recordable)")
+
+
+class TrafficReplayer:
+    """
+    Replays a recorded trace against a fresh IMSApi.
+
+    Modes:
+      - speed=1.0            : original pacing
+      - speed=N (N > 1)      : N times faster
+      - speed=None           : as fast as possible
+      - concurrency=N (N > 1): N worker threads, ignores pacing and order
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.calls: List[Dict] = []
+        self.expected_state: Optional[Dict] = None
+        with _open(path, "r") as f:
+            for line in f:
+                entry = json.loads(line, object_hook=_decode)
+                if "state" in entry:
+                    self.expected_state = entry["state"]
+                else:
+                    self.calls.append(entry)
+        # Entries are written as calls finish; replay in start order
+        self.calls.sort(key=lambda call: call["t"])
+
+    def __repr__(self):
+        return f"<TrafficReplayer path={self.path}, calls={len(self.calls)}>"
+
+    def replay(self, api_factory=None, speed: Optional[float] = None, concurrency: int = 1,
+               quiet: bool = True) -> Dict:
+        """
+        Replay the trace and return a report comparing it with the recording.
+
+        Parameters:
+          api_factory: Callable returning a fresh IMSApi (defaults to IMSApi()).
+          speed (float): Pacing multiplier, or None for no pacing.
+          concurrency (int): Number of worker threads.
+          quiet (bool): Silence the endpoints' console output during replay.
+        """
+        if api_factory is None:
+            from app.api.ims_api import IMSApi
+            api_factory = IMSApi
+        if speed is not None and speed <= 0:
+            raise ValueError("Replay speed must be positive.")
+
+        api = api_factory()
+        results: List[Optional[Dict]] = [None] * len(self.calls)
+
+        def run(index: int):
+            call = self.calls[index]
+            args = _resolve(call["a"], call["t"])
+            kwargs = _resolve(call["k"], call["t"])
+            error = None
+            start = time.perf_counter()
+            try:
+                getattr(api, call["m"])(*args, **kwargs)
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+            results[index] = {"d": time.perf_counter() - start, "e": error}
+
+        output = io.StringIO() if quiet else None
+        with contextlib.redirect_stdout(output) if quiet else contextlib.nullcontext():
+            started = time.perf_counter()
+            if concurrency > 1:
+                with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                    list(pool.map(run, range(len(self.calls))))
+            else:
+                for i, call in enumerate(self.calls):
+                    if speed is not None:
+                        wait = started + call["t"] / speed - time.perf_counter()
+                        if wait > 0:
+                            time.sleep(wait)
+                    run(i)
+            elapsed = time.perf_counter() - started
+
+        return self._report(api, results, elapsed, ordered=concurrency <= 1)
+
+    def _report(self, api, results: List[Dict], elapsed: float, ordered: bool) -> Dict:
+        recorded_span = max((c["t"] + c["d"] for c in self.calls), default=0.0)
+        recorded = _latency_stats([c["d"] for c in self.calls])
+        replayed = _latency_stats([r["d"] for r in results])
+        recorded["throughput"] = len(self.calls) / recorded_span if recorded_span else 0.0
+        replayed["throughput"] = len(results) / elapsed if elapsed else 0.0
+
+        error_mismatches = [
+            i for i, (c, r) in enumerate(zip(self.calls, results))
+            if (c["e"] is None) != (r["e"] is None)
+        ]
+        # Ids are assigned in arrival order, so an exact state comparison is
+        # only meaningful for ordered replays; concurrent ones compare aggregates.
+        state = snapshot_state(api)
+        state_matches = aggregates_match = None
+        if self.expected_state is not None:
+            if ordered:
+                state_matches = state == self.expected_state
+            aggregates_match = _aggregates(state) == _aggregates(self.expected_state)
+
+        report = {
+            "calls": len(self.calls),
+            "state_matches": state_matches,
+            "aggregates_match": aggregates_match,
+            "error_mismatches": error_mismatches,
+            "recorded": recorded,
+            "replayed": replayed,
+            "delta": {key: replayed[key] - recorded[key] for key in ("mean_ms", "p50_ms", "p95_ms", "throughput")},
+        }
+        print(
+            f"[TrafficReplayer] {len(self.calls)} calls, state_matches={state_matches}, "
+            f"aggregates_match={aggregates_match}, "
+            f"p95 {recorded['p95_ms']:.3f}ms -> {replayed['p95_ms']:.3f}ms"
+        )
+        return report
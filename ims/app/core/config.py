@@ -4,6 +4,7 @@ Basic configuration management for the IMS project.
 """
 
 import os
+from app.utils.money import from_cents
 
 
 class Config:
@@ -18,12 +19,13 @@ class Config:
     DEBUG = ENV == "development"
     DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///ims_demo.db")
 
-    # Subscription settings
+    # Subscription settings (prices in integer cents)
     DEFAULT_PLAN = "monthly"
-    PLAN_PRICES = {
-        "monthly": 19.99,
-        "yearly": 199.99
+    PLAN_PRICES_CENTS = {
+        "monthly": 1999,
+        "yearly": 19999
     }
+    PLAN_PRICES = {plan: from_cents(cents) for plan, cents in PLAN_PRICES_CENTS.items()}
 
     @staticmethod
     def show_info():
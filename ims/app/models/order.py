@@ -4,6 +4,7 @@ Defines the structure for customer orders.
 """
 
 from datetime import datetime
+from app.utils.money import Amount, to_cents, from_cents
 
 
 class Order:
@@ -11,14 +12,19 @@ class Order:
     Represents a customer's order, linked to tenant and product.
     """
 
-    def __init__(self, order_id: int, tenant_id: int, product_id: int, quantity: int, total_price: float):
+    def __init__(self, order_id: int, tenant_id: int, product_id: int, quantity: int, total_price: Amount):
         self.id = order_id
         self.tenant_id = tenant_id
         self.product_id = product_id
         self.quantity = quantity
-        self.total_price = round(total_price, 2)
+        self.total_cents = to_cents(total_price)
         self.status = "CREATED"
         self.created_at = datetime.now()
 
+    @property
+    def total_price(self) -> float:
+        """Order total as a decimal amount."""
+        return from_cents(self.total_cents)
+
     def __repr__(self):
         return f"<Order id={self.id}, tenant={self.tenant_id}, total={self.total_price}, status={self.status}>"
\ No newline at end of file
@@ -4,6 +4,7 @@ Defines product and variant models used in the inventory and order systems.
 """
 
 from datetime import datetime
+from app.utils.money import Amount, to_cents, from_cents
 
 
 class Product:
@@ -11,12 +12,17 @@ class Product:
     Represents a product (e.g., T-shirt, jacket, etc.)
     """
 
-    def __init__(self, product_id: int, name: str, category: str, price: float):
+    def __init__(self, product_id: int, name: str, category: str, price: Amount):
         self.id = product_id
         self.name = name
         self.category = category
-        self.price = round(price, 2)
+        self.price_cents = to_cents(price)
         self.created_at = datetime.now()
 
+    @property
+    def price(self) -> float:
+        """Unit price as a decimal amount."""
+        return from_cents(self.price_cents)
+
     def __repr__(self):
         return f"<Product id={self.id}, name={self.name}, price={self.price}>"
\ No newline at end of file
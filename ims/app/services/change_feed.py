@@ -0,0 +1,258 @@
+"""
+app/services/change_feed.py
+In-process change-data-capture (CDC) feed.
+
+Services publish an event for every state change (stock adjusted, order
+created/cancelled, payment made/refunded). Downstream consumers such as a
+storefront cache or search indexer tail the feed from a sequence number and
+receive batches of deltas instead of re-reading the full state.
+"""
+
+import asyncio
+import threading
+import weakref
+from collections import deque
+from itertools import islice
+from datetime import datetime
+from typing import Dict, List, Optional
+
+
+class ChangeEvent:
+    """
+    One entry in the change feed.
+    Sequence numbers start at 1 and increase by one per event.
+    """
+
+    def __init__(self, seq: int, kind: str, data: Dict):
+        self.seq = seq
+        self.kind = kind
+        self.data = data
+        self.created_at = datetime.now()
+
+    def __repr__(self):
+        return f"<ChangeEvent seq={self.seq}, kind={self.kind}, data={self.data}>"
+
+
+class FeedSubscription:
+    """
+    A consumer's cursor into the change feed.
+
+    The subscription may fall at most `max_lag` events behind the head.
+    When it does, the feed applies the subscription's policy:
+      - "block": the publisher waits (up to the feed's block_timeout) for
+                 this consumer to catch up; after a timeout the consumer is
+                 marked `stalled` and treated like "drop" until it has
+                 read everything published
+      - "drop":  the oldest unread events are skipped (counted in `dropped`)
+
+    Call close() when done, or use the subscription as a context manager.
+    The feed only holds a weak reference, so a forgotten subscription stops
+    applying backpressure once it is garbage collected.
+    """
+
+    def __init__(self, feed: "ChangeFeed", position: int, max_lag: int, policy: str):
+        self.feed = feed
+        self.position = position  # Sequence number of the last event consumed
+        self.max_lag = max_lag
+        self.policy = policy
+        self.dropped = 0
+        self.stalled = False
+        self.closed = False
+
+    def __repr__(self):
+        return (f"<FeedSubscription position={self.position}, policy={self.policy}, "
+                f"dropped={self.dropped}, stalled={self.stalled}>")
+
+    @property
+    def lag(self) -> int:
+        """Number of published events not yet consumed."""
+        return self.feed.last_seq - self.position
+
+    def poll(self, max_items: int = 100, timeout: Optional[float] = 0) -> List[ChangeEvent]:
+        """
+        Return the next batch of up to max_items events.
+        Waits up to `timeout` seconds for new events (None = wait forever).
+        Returns an empty list if nothing arrived in time or the subscription is closed.
+        """
+        return self.feed._read(self, max_items, timeout)
+
+    def close(self):
+        """Detach from the feed and release any publisher blocked on this consumer."""
+        self.feed._unsubscribe(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def __iter__(self):
+        """Yield batches of events, blocking between them, until closed."""
+        while not self.closed:
+            batch = self.poll(timeout=None)
+            if batch:
+                yield batch
+
+    async def batches(self, max_items: int = 100, poll_interval: float = 0.05):
+        """Async generator yielding batches of events until closed."""
+        while not self.closed:
+            batch = self.poll(max_items)
+            if batch:
+                yield batch
+            else:
+                await asyncio.sleep(poll_interval)
+
+    def __aiter__(self):
+        return self.batches()
+
+
+class ChangeFeed:
+    """
+    Append-only, bounded log of change events.
+
+    Responsibilities:
+      - Assign monotonically increasing sequence numbers
+      - Retain the most recent `retention` events for replay
+      - Deliver events to subscriptions in batches with backpressure or drop policies
+    """
+
+    POLICIES = ("block", "drop")
+
+    def __init__(self, retention: int = 10000, block_timeout: float = 5.0):
+        self.retention = retention
+        self.block_timeout = block_timeout  # Max seconds a publisher waits on a "block" consumer
+        self.log = deque(maxlen=retention)
+        self.last_seq = 0
+        self.subscriptions = weakref.WeakSet()  # Unreferenced subscriptions fall away on their own
+        self._reserved_seq = 0
+        self._pending: Dict[int, ChangeEvent] = {}
+        self._flushing = False
+        self._cond = threading.Condition()
+
+    @property
+    def first_seq(self) -> int:
+        """Sequence number of the oldest retained event (last_seq + 1 if empty)."""
+        return self.log[0].seq if self.log else self.last_seq + 1
+
+    def reserve(self) -> int:
+        """
+        Reserve the next sequence number without publishing yet.
+        Never blocks, so it is safe to call while holding a service lock;
+        every reserved number must later be passed to publish_reserved().
+        """
+        with self._cond:
+            self._reserved_seq += 1
+            return self._reserved_seq
+
+    def publish(self, kind: str, **data) -> ChangeEvent:
+        """Append an event and wake up waiting consumers."""
+        return self.publish_reserved(self.reserve(), kind, **data)
+
+    def publish_reserved(self, seq: int, kind: str, **data) -> ChangeEvent:
+        """
+        Publish an event under a number obtained from reserve().
+        Events reach the log strictly in sequence order. An event whose
+        predecessors are still unpublished, or that arrives while another
+        publisher is draining, is staged and appended by that publisher;
+        only the draining publisher waits on blocking consumers.
+        """
+        event = ChangeEvent(seq, kind, data)
+        with self._cond:
+            self._pending[seq] = event
+            if self._flushing:
+                return event
+            self._flushing = True
+            try:
+                while self.last_seq + 1 in self._pending:
+                    self._wait_for_room()
+                    head = self._pending.pop(self.last_seq + 1)
+                    self.last_seq = head.seq
+                    self.log.append(head)
+
+                    for sub in self.subscriptions:
+                        overflow = self.last_seq - sub.position - sub.max_lag
+                        if overflow > 0:
+                            sub.position += overflow
+                            sub.dropped += overflow
+
+                    self._cond.notify_all()
+            finally:
+                self._flushing = False
+        return event
+
+    def _wait_for_room(self):
+        """
+        Backpressure: wait for blocking consumers at their limit, up to block_timeout.
+        A consumer still at its limit after the timeout is marked stalled, so
+        later publishes don't wait on it again until it catches up.
+        """
+        def at_limit():
+            return [
+                sub for sub in self.subscriptions
+                if sub.policy == "block" and not sub.stalled
+                and self.last_seq - sub.position >= sub.max_lag
+            ]
+
+        if not self._cond.wait_for(lambda: not at_limit(), self.block_timeout):
+            for sub in at_limit():
+                sub.stalled = True
+            print(f"[ChangeFeed] Blocking consumer did not catch up within {self.block_timeout}s; dropping events.")
+
+    def subscribe(self, from_seq: Optional[int] = None, max_lag: int = 1000,
+                  policy: str = "drop") -> FeedSubscription:
+        """
+        Start tailing the feed.
+
+        Parameters:
+          from_seq (int): Deliver events with seq > from_seq. None tails from now.
+          max_lag (int): How far behind the head this consumer may fall.
+          policy (str): 'block' (publisher waits) or 'drop' (skip oldest events).
+        """
+        if policy not in self.POLICIES:
+            raise ValueError(f"Unsupported policy '{policy}'. Use 'block' or 'drop'.")
+        if not 0 < max_lag <= self.retention:
+            raise ValueError(f"max_lag must be between 1 and {self.retention}.")
+
+        with self._cond:
+            if from_seq is None:
+                from_seq = self.last_seq
+            if from_seq < self.first_seq - 1 or from_seq > self.last_seq:
+                raise ValueError(
+                    f"Position {from_seq} is outside the retained range "
+                    f"{self.first_seq - 1}..{self.last_seq}."
+                )
+            sub = FeedSubscription(self, from_seq, max_lag, policy)
+            # Starting far behind counts as lag too
+            overflow = self.last_seq - from_seq - max_lag
+            if overflow > 0:
+                if policy == "block":
+                    raise ValueError(f"Position {from_seq} is more than {max_lag} events behind.")
+                sub.position += overflow
+                sub.dropped += overflow
+            self.subscriptions.add(sub)
+            return sub
+
+    def events_since(self, seq: int, limit: int = 100) -> List[ChangeEvent]:
+        """Return up to `limit` retained events with sequence number > seq."""
+        with self._cond:
+            start = max(seq + 1 - self.first_seq, 0)
+            return list(islice(self.log, start, start + limit))
+
+    def _read(self, sub: FeedSubscription, max_items: int, timeout: Optional[float]) -> List[ChangeEvent]:
+        with self._cond:
+            self._cond.wait_for(lambda: sub.closed or self.last_seq > sub.position, timeout)
+            if sub.closed:
+                return []
+            batch = self.events_since(sub.position, max_items)
+            if batch:
+                sub.position = batch[-1].seq
+                if sub.position == self.last_seq:
+                    sub.stalled = False
+                self._cond.notify_all()
+            return batch
+
+    def _unsubscribe(self, sub: FeedSubscription):
+        with self._cond:
+            sub.closed = True
+            self.subscriptions.discard(sub)
+            self._cond.notify_all()
@@ -0,0 +1,162 @@
+"""
+app/services/inventory_ledger.py
+Point-in-time stock ledger.
+
+Every stock change is appended as a movement (timestamp, delta, reason).
+Every `checkpoint_interval` movements the running stock level is saved as a
+checkpoint, so an as-of lookup is one bisect over checkpoints plus at most
+`checkpoint_interval` deltas, no matter how long the history grows.
+Old movements can be compacted away; their checkpoints remain.
+
+Times are stored as POSIX seconds (time.time()), which do not jump on DST
+changes; if the system clock steps backwards, new movements are clamped to
+the previous time so the arrays stay sorted for bisect.
+"""
+
+import time
+from array import array
+from bisect import bisect_right, bisect_left
+from datetime import datetime
+from typing import Dict, List, Optional
+
+REASONS = ("receive", "order", "cancel", "manual")
+
+
+def _timestamp(at: Optional[datetime]) -> float:
+    """POSIX seconds for `at`, or now if omitted."""
+    return time.time() if at is None else at.timestamp()
+
+
+class VariantLedger:
+    """
+    Movement history of one variant.
+    Stored in typed arrays (8 bytes per timestamp/delta, 1 byte per reason).
+    """
+
+    def __init__(self, variant_id: int, initial_stock: int, opened_at: float):
+        self.variant_id = variant_id
+
+        # Live movements; index i has absolute sequence number base + i
+        self.base = 0
+        self.times = array("d")
+        self.deltas = array("q")
+        self.reasons = array("b")
+
+        # Checkpoints: stock level right before movement number cp_seq[i]
+        self.cp_times = array("d", [opened_at])
+        self.cp_stock = array("q", [initial_stock])
+        self.cp_seq = array("q", [0])
+
+        self.stock = initial_stock
+
+    def __repr__(self):
+        return (f"<VariantLedger variant={self.variant_id}, movements={len(self.times)}, "
+                f"checkpoints={len(self.cp_times)}>")
+
+    @property
+    def next_seq(self) -> int:
+        return self.base + len(self.times)
+
+    def append(self, at: float, delta: int, reason: str, checkpoint_interval: int):
+        # Validate everything first so the three arrays always stay aligned
+        code = REASONS.index(reason)
+        if not isinstance(delta, int) or isinstance(delta, bool):
+            raise ValueError(f"Stock delta must be an integer, got {delta!r}.")
+        # Never go back in time, or bisect over the arrays breaks
+        at = max(float(at), self.times[-1] if self.times else self.cp_times[-1])
+        self.times.append(at)
+        self.deltas.append(delta)
+        self.reasons.append(code)
+        self.stock += delta
+        if self.next_seq % checkpoint_interval == 0:
+            self._add_checkpoint(at, self.stock, self.next_seq)
+
+    def _add_checkpoint(self, at: float, stock: int, seq: int):
+        pos = bisect_left(self.cp_seq, seq)
+        if pos < len(self.cp_seq) and self.cp_seq[pos] == seq:
+            return
+        self.cp_times.insert(pos, at)
+        self.cp_stock.insert(pos, stock)
+        self.cp_seq.insert(pos, seq)
+
+    def stock_at(self, at: float) -> Optional[int]:
+        """Stock level at timestamp `at`, or None if the variant didn't exist yet."""
+        i = bisect_right(self.cp_times, at) - 1
+        if i < 0:
+            return None
+        stock = self.cp_stock[i]
+        lo = self.cp_seq[i] - self.base
+        if lo < 0:
+            # Movements after this checkpoint were compacted; checkpoint granularity only
+            return stock
+        hi = self.cp_seq[i + 1] - self.base if i + 1 < len(self.cp_seq) else len(self.times)
+        end = bisect_right(self.times, at, lo, hi)
+        return stock + sum(self.deltas[lo:end])
+
+    def compact(self, before: float) -> int:
+        """Drop movements older than `before`, leaving a checkpoint in their place."""
+        k = bisect_left(self.times, before)
+        if k == 0:
+            return 0
+        stock = self.stock_at(self.times[k - 1])
+        self._add_checkpoint(self.times[k - 1], stock, self.base + k)
+        del self.times[:k]
+        del self.deltas[:k]
+        del self.reasons[:k]
+        self.base += k
+        return k
+
+
+class InventoryLedger:
+    """
+    Collection of per-variant ledgers.
+
+    Responsibilities:
+      - Record each stock movement with its reason
+      - Answer "what was stock for variant X at time T?" in O(log n)
+      - Compact old movements into checkpoints
+    """
+
+    def __init__(self, checkpoint_interval: int = 64):
+        self.checkpoint_interval = checkpoint_interval
+        self.variants: Dict[int, VariantLedger] = {}
+
+    def open(self, variant_id: int, initial_stock: int, at: datetime = None):
+        """Start tracking a variant with its opening stock (at defaults to now)."""
+        self.variants[variant_id] = VariantLedger(variant_id, initial_stock, _timestamp(at))
+
+    def record(self, variant_id: int, delta: int, reason: str, at: datetime = None):
+        """Append one movement for a variant (at defaults to now)."""
+        if reason not in REASONS:
+            raise ValueError(f"Unsupported reason '{reason}'. Use one of {', '.join(REASONS)}.")
+        if variant_id not in self.variants:
+            raise ValueError(f"Variant {variant_id} has no ledger.")
+        self.variants[variant_id].append(_timestamp(at), delta, reason, self.checkpoint_interval)
+
+    def stock_as_of(self, variant_id: int, at: datetime) -> int:
+        """Stock level of a variant at a point in time (0 before it was registered)."""
+        if variant_id not in self.variants:
+            raise ValueError(f"Variant {variant_id} has no ledger.")
+        stock = self.variants[variant_id].stock_at(at.timestamp())
+        return 0 if stock is None else stock
+
+    def movements(self, variant_id: int, start: datetime = None, end: datetime = None) -> List[Dict]:
+        """List retained movements of a variant in [start, end]."""
+        if variant_id not in self.variants:
+            raise ValueError(f"Variant {variant_id} has no ledger.")
+        ledger = self.variants[variant_id]
+        lo = 0 if start is None else bisect_left(ledger.times, start.timestamp())
+        hi = len(ledger.times) if end is None else bisect_right(ledger.times, end.timestamp())
+        return [
+            {
+                "at": datetime.fromtimestamp(ledger.times[i]),
+                "delta": ledger.deltas[i],
+                "reason": REASONS[ledger.reasons[i]],
+            }
+            for i in range(lo, hi)
+        ]
+
+    def compact(self, before: datetime) -> int:
+        """Compact movements older than `before` for all variants. Returns how many were dropped."""
+        cutoff = before.timestamp()
+        return sum(ledger.compact(cutoff) for ledger in self.variants.values())
@@ -7,7 +7,11 @@
 
 """
 
+import threading
 from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from app.services.change_feed import ChangeFeed
+from app.services.inventory_ledger import InventoryLedger, REASONS
 
 
 class InventoryItem:
@@ -20,14 +24,22 @@ class InventoryItem:
         self.variant_id = variant_id
         self.name = name
         self.stock = stock
+        self.version = 0  # Bumped on every write, used for compare-and-set
         self.updated_at = datetime.now()
 
     def __repr__(self):
-        return f"<InventoryItem id={self.variant_id}, name={self.name}, stock={self.stock}>"
+        return f"<InventoryItem id={self.variant_id}, name={self.name}, stock={self.stock}, v={self.version}>"
 
     def adjust(self, quantity: int):
         """Increase or decrease stock quantity."""
         self.stock += quantity
+        self.version += 1
+        self.updated_at = datetime.now()
+
+    def set_stock(self, stock: int):
+        """Overwrite the stock quantity."""
+        self.stock = stock
+        self.version += 1
         self.updated_at = datetime.now()
 
 
@@ -40,16 +52,28 @@ class InventoryService:
       - Adjust existing stock levels
       - Query current stock
       - Validate inventory availability for orders
+      - Optimistic (versioned compare-and-set) stock updates
+      - Record stock movements for point-in-time (as-of) queries
     """
 
-    def __init__(self):
+    def __init__(self, change_feed: Optional[ChangeFeed] = None):
         # Simulate a simple in-memory "database"
         # Key: variant_id, Value: InventoryItem
         self.items = {}
 
+        # Optional CDC feed; every stock write is published to it
+        self.change_feed = change_feed
+
+        # Guards only the compare-and-write step; reads never take it
+        self._write_lock = threading.Lock()
+
+        # Movement history per variant, for as-of stock queries
+        self.ledger = InventoryLedger()
+
         # Preload one default item for demo purposes
         default_item = InventoryItem(variant_id=101, name="Classic White T-Shirt", stock=0)
         self.items[default_item.variant_id] = default_item
+        self.ledger.open(default_item.variant_id, default_item.stock)
 
     # Inventory CRUD (Core Methods)
 
@@ -59,25 +83,35 @@ class InventoryService:
             raise ValueError(f"Variant {variant_id} already exists in inventory.")
         item = InventoryItem(variant_id=variant_id, name=name, stock=initial_stock)
         self.items[variant_id] = item
+        self.ledger.open(variant_id, initial_stock)
         print(f"[Inventory] Added item: {item}")
         return item
 
-    def adjust_stock(self, variant_id: int, quantity: int) -> int:
+    def adjust_stock(self, variant_id: int, quantity: int, reason: str = "manual") -> int:
         """
         Adjust stock quantity for an existing item.
         Positive quantity → Add stock
         Negative quantity → Deduct stock
+        The reason ('receive', 'order', 'cancel', 'manual') is kept in the ledger.
         """
+        self._check_reason(reason)
+        self._check_quantity(quantity)
         if variant_id not in self.items:
             raise ValueError(f"Variant {variant_id} not found in inventory.")
 
         item = self.items[variant_id]
-        new_stock = item.stock + quantity
-        if new_stock < 0:
-            raise ValueError(f"Insufficient stock for variant {variant_id}. Current: {item.stock}")
+        events = []
+        try:
+            with self._write_lock:
+                new_stock = item.stock + quantity
+                if new_stock < 0:
+                    raise ValueError(f"Insufficient stock for variant {variant_id}. Current: {item.stock}")
 
-        item.adjust(quantity)
-        return item.stock
+                item.adjust(quantity)
+                self._record_change(item, quantity, reason, events)
+                return item.stock
+        finally:
+            self._publish(events)
 
     def get_stock(self, variant_id: int) -> int:
         """Return the current stock level of an item."""
@@ -85,6 +119,183 @@ class InventoryService:
             raise ValueError(f"Variant {variant_id} not found.")
         return self.items[variant_id].stock
 
+    def get_stock_version(self, variant_id: int) -> Tuple[int, int]:
+        """Return (stock, version) for an item, to be used with the CAS methods."""
+        if variant_id not in self.items:
+            raise ValueError(f"Variant {variant_id} not found.")
+        item = self.items[variant_id]
+        return item.stock, item.version
+
+    # Optimistic Concurrency (Compare-and-Set)
+
+    def compare_and_set_stock(self, variant_id: int, expected_version: int, new_stock: int,
+                              reason: str = "manual") -> bool:
+        """
+        Overwrite stock only if the item is still at expected_version.
+        Returns True on success, False if another writer got there first.
+        """
+        self._check_reason(reason)
+        self._check_quantity(new_stock)
+        if variant_id not in self.items:
+            raise ValueError(f"Variant {variant_id} not found in inventory.")
+        if new_stock < 0:
+            raise ValueError(f"Stock for variant {variant_id} cannot be negative.")
+
+        item = self.items[variant_id]
+        events = []
+        try:
+            with self._write_lock:
+                if item.version != expected_version:
+                    return False
+                delta = new_stock - item.stock
+                item.set_stock(new_stock)
+                self._record_change(item, delta, reason, events)
+                return True
+        finally:
+            self._publish(events)
+
+    def adjust_if_version(self, variant_id: int, expected_version: int, quantity: int,
+                          reason: str = "manual") -> bool:
+        """
+        Apply a stock delta only if the item is still at expected_version.
+        Returns True on success, False on a version conflict.
+        """
+        return self.adjust_many_if_versions(
+            [{"variant_id": variant_id, "version": expected_version, "qty": quantity}], reason
+        ) is not None
+
+    def adjust_many_if_versions(self, changes: List[Dict], reason: str = "manual") -> Optional[Dict[int, int]]:
+        """
+        Apply several stock deltas atomically (all or nothing).
+
+        Parameters:
+          changes (list): A list of dicts like:
+                [{"variant_id": 101, "version": 3, "qty": -2}]
+
+        Returns {variant_id: new_stock} as written by this call, or None
+        without writing anything if any version is stale.
+        Raises ValueError if any delta would make stock negative.
+        """
+        self._check_reason(reason)
+
+        # Merge repeated variants so each item is checked and written once
+        merged: Dict[int, Dict] = {}
+        for change in changes:
+            variant_id = change["variant_id"]
+            self._check_quantity(change["qty"])
+            if variant_id not in self.items:
+                raise ValueError(f"Variant {variant_id} not found in inventory.")
+            entry = merged.setdefault(variant_id, {"version": change["version"], "qty": 0})
+            if entry["version"] != change["version"]:
+                return None
+            entry["qty"] += change["qty"]
+
+        events = []
+        try:
+            with self._write_lock:
+                for variant_id, entry in merged.items():
+                    if self.items[variant_id].version != entry["version"]:
+                        return None
+                for variant_id, entry in merged.items():
+                    item = self.items[variant_id]
+                    if item.stock + entry["qty"] < 0:
+                        raise ValueError(
+                            f"Insufficient stock for variant {variant_id}. Current: {item.stock}"
+                        )
+                new_stock = {}
+                for variant_id, entry in merged.items():
+                    item = self.items[variant_id]
+                    item.adjust(entry["qty"])
+                    self._record_change(item, entry["qty"], reason, events)
+                    new_stock[variant_id] = item.stock
+        finally:
+            self._publish(events)
+        return new_stock
+
+    def adjust_with_retry(self, variant_id: int, quantity: int, max_retries: int = 5,
+                          reason: str = "manual") -> int:
+        """
+        Read-check-write loop on top of adjust_if_version.
+        Retries on version conflicts and returns the new stock level.
+        """
+        return self.adjust_many_with_retry({variant_id: quantity}, max_retries, reason)[variant_id]
+
+    def adjust_many_with_retry(self, deltas: Dict[int, int], max_retries: int = 5,
+                               reason: str = "manual") -> Dict[int, int]:
+        """
+        Apply {variant_id: qty} deltas atomically, retrying on version conflicts.
+        Returns {variant_id: new_stock}.
+        """
+        for _ in range(max_retries):
+            changes = []
+            for variant_id, qty in deltas.items():
+                stock, version = self.get_stock_version(variant_id)
+                if stock + qty < 0:
+                    raise ValueError(
+                        f"Insufficient stock for variant {variant_id}. "
+                        f"Available: {stock}, Required: {-qty}"
+                    )
+                changes.append({"variant_id": variant_id, "version": version, "qty": qty})
+            new_stock = self.adjust_many_if_versions(changes, reason)
+            if new_stock is not None:
+                return new_stock
+        raise ValueError(f"Stock update for variants {list(deltas)} conflicted {max_retries} times.")
+
+    # Point-in-time Queries
+
+    def get_stock_as_of(self, variant_id: int, at: datetime) -> int:
+        """Return the stock level a variant had at a given point in time."""
+        if variant_id not in self.items:
+            raise ValueError(f"Variant {variant_id} not found.")
+        # Compaction shifts the ledger arrays, so reads take the write lock too
+        with self._write_lock:
+            return self.ledger.stock_as_of(variant_id, at)
+
+    def get_movements(self, variant_id: int, start: datetime = None, end: datetime = None) -> List[Dict]:
+        """Return the recorded stock movements of a variant within [start, end]."""
+        if variant_id not in self.items:
+            raise ValueError(f"Variant {variant_id} not found.")
+        with self._write_lock:
+            return self.ledger.movements(variant_id, start, end)
+
+    def compact_ledger(self, before: datetime) -> int:
+        """Fold movements older than `before` into checkpoints. Returns the number dropped."""
+        with self._write_lock:
+            return self.ledger.compact(before)
+
+    @staticmethod
+    def _check_reason(reason: str):
+        if reason not in REASONS:
+            raise ValueError(f"Unsupported reason '{reason}'. Use one of {', '.join(REASONS)}.")
+
+    @staticmethod
+    def _check_quantity(quantity: int):
+        # Checked before any write so a bad value never leaves stock half-updated
+        if not isinstance(quantity, int) or isinstance(quantity, bool):
+            raise ValueError(f"Stock quantity must be an integer, got {quantity!r}.")
+
+    def _record_change(self, item: InventoryItem, delta: int, reason: str, events: list):
+        """
+        Append a stock change to the ledger and queue its CDC event.
+        Called under _write_lock: the feed sequence number is reserved here so
+        events keep write order, but publishing (which may block on slow
+        consumers) happens in _publish() after the lock is released.
+        """
+        self.ledger.record(item.variant_id, delta, reason)
+        if self.change_feed is not None:
+            events.append((self.change_feed.reserve(), {
+                "variant_id": item.variant_id,
+                "delta": delta,
+                "stock": item.stock,
+                "version": item.version,
+                "reason": reason,
+            }))
+
+    def _publish(self, events: list):
+        """Publish events queued by _record_change (call outside _write_lock)."""
+        for seq, data in events:
+            self.change_feed.publish_reserved(seq, "stock_adjusted", **data)
+
     def list_all_items(self):
         """Return all inventory records (for admin/debug)."""
         print("\n=== Current Inventory ===")
@@ -97,6 +308,13 @@ class InventoryService:
 
     def reset_inventory(self):
         """Reset all stock quantities (used in tests)."""
-        for item in self.items.values():
-            item.stock = 0
+        events = []
+        try:
+            with self._write_lock:
+                for item in self.items.values():
+                    delta = -item.stock
+                    item.set_stock(0)
+                    self._record_change(item, delta, "manual", events)
+        finally:
+            self._publish(events)
         print("[Inventory] All stock reset to 0.")
\ No newline at end of file
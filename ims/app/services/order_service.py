@@ -10,23 +10,36 @@
 """
 
 from datetime import datetime
-from typing import List, Dict
+from typing import List, Dict, Optional, Tuple
+from app.services.change_feed import ChangeFeed
 from app.services.inventory_service import InventoryService
+from app.utils.money import Amount, to_cents, from_cents, line_totals_cents, sum_cents
 
 
 class OrderItem:
     """
     Represents a single product line inside an order.
+    Unit price is stored as integer cents.
     """
-    def __init__(self, variant_id: int, qty: int, price: float):
+    def __init__(self, variant_id: int, qty: int, price: Amount):
         self.variant_id = variant_id
         self.qty = qty
-        self.price = price
+        self.price_cents = to_cents(price)
+
+    @property
+    def price(self) -> float:
+        """Unit price as a decimal amount."""
+        return from_cents(self.price_cents)
+
+    @property
+    def subtotal_cents(self) -> int:
+        """Exact subtotal for this line in cents."""
+        return self.qty * self.price_cents
 
     @property
     def subtotal(self) -> float:
         """Calculate subtotal for this line."""
-        return round(self.qty * self.price, 2)
+        return from_cents(self.subtotal_cents)
 
     def __repr__(self):
         return f"<OrderItem variant={self.variant_id}, qty={self.qty}, price={self.price}>"
@@ -46,11 +59,23 @@ class Order:
         self.items = items
         self.status = "CREATED"
         self.created_at = datetime.now()
-        self.total_amount = self.calculate_total()
+        self.total_cents = self.calculate_total_cents()
+
+    @property
+    def total_amount(self) -> float:
+        """Order total as a decimal amount."""
+        return from_cents(self.total_cents)
+
+    def calculate_total_cents(self) -> int:
+        """Sum all line subtotals in cents."""
+        return line_totals_cents(
+            [item.qty for item in self.items],
+            [item.price_cents for item in self.items],
+        )
 
     def calculate_total(self) -> float:
         """Sum all line subtotals."""
-        return round(sum(item.subtotal for item in self.items), 2)
+        return from_cents(self.calculate_total_cents())
 
     def __repr__(self):
         return f"<Order id={self.id}, tenant={self.tenant_id}, total={self.total_amount}>"
@@ -66,10 +91,13 @@ class OrderService:
       - Manage order status transitions
     """
 
-    def __init__(self, inventory_service: InventoryService):
+    def __init__(self, inventory_service: InventoryService, change_feed: Optional[ChangeFeed] = None):
         # Dependency injection — inventory service is shared
         self.inventory_service = inventory_service
 
+        # Optional CDC feed for order lifecycle events
+        self.change_feed = change_feed
+
         # Internal "database" of orders
         self.orders: Dict[int, Order] = {}
         self.next_id = 1  # Auto-increment simulation
@@ -88,24 +116,27 @@ class OrderService:
         # Step 1. Convert input dicts → OrderItem objects
         order_items = [OrderItem(**i) for i in items]
 
-        # Step 2. Validate inventory availability
-        for item in order_items:
-            stock = self.inventory_service.get_stock(item.variant_id)
-            if stock < item.qty:
-                raise ValueError(
-                    f"Insufficient stock for variant {item.variant_id}. "
-                    f"Available: {stock}, Required: {item.qty}"
-                )
-
-        # Step 3. Deduct inventory
+        # Step 2. Validate and deduct inventory in one versioned batch,
+        # so a concurrent writer can't slip in between check and deduct
+        deltas: Dict[int, int] = {}
         for item in order_items:
-            self.inventory_service.adjust_stock(item.variant_id, -item.qty)
+            deltas[item.variant_id] = deltas.get(item.variant_id, 0) - item.qty
+        self.inventory_service.adjust_many_with_retry(deltas, reason="order")
 
-        # Step 4. Create order record
+        # Step 3. Create order record
         order = Order(order_id=self.next_id, tenant_id=tenant_id, items=order_items)
         self.orders[self.next_id] = order
         self.next_id += 1
 
+        if self.change_feed is not None:
+            self.change_feed.publish(
+                "order_created",
+                order_id=order.id,
+                tenant_id=tenant_id,
+                total_cents=order.total_cents,
+                items=[{"variant_id": i.variant_id, "qty": i.qty} for i in order_items],
+            )
+
         print(f"[OrderService] Created {order}")
         return order
 
@@ -115,6 +146,24 @@ class OrderService:
             raise ValueError(f"Order ID {order_id} not found.")
         return self.orders[order_id]
 
+    def find_orders(self, tenant_id: int = None, start: datetime = None, end: datetime = None,
+                    status: str = None) -> List[Order]:
+        """Return orders matching tenant, creation window [start, end] and status filters."""
+        return [
+            order for order in self.orders.values()
+            if (tenant_id is None or order.tenant_id == tenant_id)
+            and (start is None or order.created_at >= start)
+            and (end is None or order.created_at <= end)
+            and (status is None or order.status == status)
+        ]
+
+    def batch_totals_cents(self, order_ids: List[int]) -> int:
+        """
+        Combined total of many orders in cents (e.g. for bulk invoicing).
+        Uses the stored per-order totals, so no line items are re-read.
+        """
+        return sum_cents(self.get_order(order_id).total_cents for order_id in order_ids)
+
     def list_orders(self):
         """List all orders for debugging/demo."""
         print("\n=== All Orders ===")
@@ -128,6 +177,36 @@ class OrderService:
         if order.status != "CREATED":
             raise ValueError("Only newly created orders can be cancelled.")
         for item in order.items:
-            self.inventory_service.adjust_stock(item.variant_id, item.qty)
+            self.inventory_service.adjust_stock(item.variant_id, item.qty, reason="cancel")
         order.status = "CANCELLED"
-        print(f"[OrderService] Order {order_id} cancelled and stock restored.")
\ No newline at end of file
+        if self.change_feed is not None:
+            self.change_feed.publish("order_cancelled", order_id=order.id, tenant_id=order.tenant_id)
+        print(f"[OrderService] Order {order_id} cancelled and stock restored.")
+
+    def cancel_orders(self, order_ids: List[int]) -> Tuple[List[Order], Dict[int, int]]:
+        """
+        Cancel many orders at once.
+
+        Restored quantities are summed per variant and written back in a
+        single inventory batch instead of one adjustment per order line.
+        Orders that are not in CREATED status are skipped.
+        Returns (orders actually cancelled, {variant_id: restored_qty}).
+        """
+        # dict.fromkeys drops repeated ids while keeping their order
+        orders = [self.get_order(order_id) for order_id in dict.fromkeys(order_ids)]
+        orders = [order for order in orders if order.status == "CREATED"]
+
+        restored: Dict[int, int] = {}
+        for order in orders:
+            for item in order.items:
+                restored[item.variant_id] = restored.get(item.variant_id, 0) + item.qty
+        if restored:
+            self.inventory_service.adjust_many_with_retry(restored, reason="cancel")
+
+        for order in orders:
+            order.status = "CANCELLED"
+            if self.change_feed is not None:
+                self.change_feed.publish("order_cancelled", order_id=order.id, tenant_id=order.tenant_id)
+
+        print(f"[OrderService] Cancelled {len(orders)} orders, restored stock for {len(restored)} variants.")
+        return orders, restored
\ No newline at end of file
@@ -5,22 +5,39 @@ This module simulates payments from customers to merchants.
 """
 
 from datetime import datetime
+from typing import Iterable, List, Optional
+from app.services.change_feed import ChangeFeed
+from app.utils.money import Amount, to_cents, from_cents
 
 
 class Payment:
     """
     Data model representing one payment transaction.
+    The amount is stored as integer cents.
     """
 
-    def __init__(self, payment_id: int, tenant_id: int, order_id: int, amount: float, method: str):
+    def __init__(self, payment_id: int, tenant_id: int, order_id: int, amount: Amount, method: str):
         self.id = payment_id
         self.tenant_id = tenant_id
         self.order_id = order_id
-        self.amount = amount
+        self.amount_cents = to_cents(amount)
         self.method = method
         self.status = "COMPLETED"
         self.created_at = datetime.now()
 
+    @classmethod
+    def from_cents(cls, payment_id: int, tenant_id: int, order_id: int, amount_cents: int,
+                   method: str) -> "Payment":
+        """Build a payment from an amount already converted to integer cents."""
+        payment = cls(payment_id, tenant_id, order_id, 0, method)
+        payment.amount_cents = amount_cents
+        return payment
+
+    @property
+    def amount(self) -> float:
+        """Payment amount as a decimal amount."""
+        return from_cents(self.amount_cents)
+
     def __repr__(self):
         return f"<Payment id={self.id}, order={self.order_id}, amount={self.amount}, method={self.method}>"
 
@@ -34,32 +51,45 @@ class PaymentService:
       - Simulate payment status (success, failed, refunded)
     """
 
-    def __init__(self):
+    def __init__(self, change_feed: Optional[ChangeFeed] = None):
         self.payments = {}  # In-memory database of payment records
         self.next_id = 1
+        self.change_feed = change_feed  # Optional CDC feed for payment events
 
-    def pay_order(self, tenant_id: int, order_id: int, amount: float, method: str = "cash") -> Payment:
+    def pay_order(self, tenant_id: int, order_id: int, amount: Amount, method: str = "cash") -> Payment:
         """
         Process a payment for a given order.
         In a real system, this could integrate with Alipay, WeChat Pay, Stripe, etc.
+        The amount may be a number or a decimal string such as "199.80".
         """
 
         # Basic validation
-        if amount <= 0:
+        amount_cents = to_cents(amount)
+        if amount_cents <= 0:
             raise ValueError("Payment amount must be positive.")
 
         # Simulate payment creation
-        payment = Payment(
+        payment = Payment.from_cents(
             payment_id=self.next_id,
             tenant_id=tenant_id,
             order_id=order_id,
-            amount=round(amount, 2),
+            amount_cents=amount_cents,
             method=method
         )
 
         self.payments[self.next_id] = payment
         self.next_id += 1
 
+        if self.change_feed is not None:
+            self.change_feed.publish(
+                "payment_completed",
+                payment_id=payment.id,
+                order_id=order_id,
+                tenant_id=tenant_id,
+                amount_cents=payment.amount_cents,
+                method=method,
+            )
+
         print(f"[PaymentService] Payment recorded: {payment}")
         return payment
 
@@ -76,10 +106,44 @@ class PaymentService:
             print(f"Payment {p.id}: order={p.order_id}, amount={p.amount}, method={p.method}, status={p.status}")
         print("=======================\n")
 
+    def find_completed_for_orders(self, order_ids: Iterable[int]) -> List[Payment]:
+        """Return all COMPLETED payments belonging to the given orders (one scan)."""
+        wanted = set(order_ids)
+        return [
+            p for p in self.payments.values()
+            if p.order_id in wanted and p.status == "COMPLETED"
+        ]
+
+    def refund_payments(self, payment_ids: Iterable[int]) -> List[Payment]:
+        """
+        Refund many payments at once.
+        Payments that are not COMPLETED are skipped. Returns the refunded payments.
+        """
+        refunded = []
+        for payment_id in payment_ids:
+            payment = self.get_payment(payment_id)
+            if payment.status != "COMPLETED":
+                continue
+            self._refund(payment)
+            refunded.append(payment)
+        print(f"[PaymentService] Refunded {len(refunded)} payments.")
+        return refunded
+
     def refund_payment(self, payment_id: int):
         """Mark a payment as refunded."""
         payment = self.get_payment(payment_id)
         if payment.status != "COMPLETED":
             raise ValueError("Only completed payments can be refunded.")
+        self._refund(payment)
+        print(f"[PaymentService] Payment {payment_id} has been refunded.")
+
+    def _refund(self, payment: Payment):
+        """Mark a completed payment as refunded and publish the change."""
         payment.status = "REFUNDED"
-        print(f"[PaymentService] Payment {payment_id} has been refunded.")
\ No newline at end of file
+        if self.change_feed is not None:
+            self.change_feed.publish(
+                "payment_refunded",
+                payment_id=payment.id,
+                order_id=payment.order_id,
+                amount_cents=payment.amount_cents,
+            )
\ No newline at end of file
@@ -0,0 +1,109 @@
+"""
+app/utils/excel_report.py
+Streaming Excel (.xlsx) report export.
+
+Uses openpyxl's write-only mode: rows are pulled lazily from the services
+and written straight to disk, so memory stays flat regardless of report
+size. Sheets that exceed Excel's row limit continue on a new sheet.
+
+Orders and payments use auto-increment ids, so their row sources only
+capture the next id when the export starts and look each record up by id;
+services can keep taking writes during a long export, and records created
+after the start are not included. Stock rows snapshot the variant ids,
+which grow with the catalogue rather than with report size.
+"""
+
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+from openpyxl import Workbook
+
+from app.services.inventory_service import InventoryService
+from app.services.order_service import OrderService
+from app.services.payment_service import PaymentService
+from app.utils.money import to_decimal
+
+# Excel allows 1,048,576 rows per sheet; one is used by the header
+EXCEL_MAX_ROWS = 1_048_575
+
+ORDER_HEADERS = ["order_id", "tenant_id", "status", "lines", "total", "created_at"]
+PAYMENT_HEADERS = ["payment_id", "order_id", "tenant_id", "amount", "method", "status", "created_at"]
+STOCK_HEADERS = ["variant_id", "name", "stock", "version", "updated_at"]
+
+
+def order_rows(order_service: OrderService, tenant_id: int = None) -> Iterator[list]:
+    """Yield one row per order."""
+    for order_id in range(1, order_service.next_id):
+        order = order_service.orders.get(order_id)
+        if order is None or (tenant_id is not None and order.tenant_id != tenant_id):
+            continue
+        yield [order.id, order.tenant_id, order.status, len(order.items),
+               to_decimal(order.total_cents), order.created_at]
+
+
+def payment_rows(payment_service: PaymentService, tenant_id: int = None) -> Iterator[list]:
+    """Yield one row per payment."""
+    for payment_id in range(1, payment_service.next_id):
+        p = payment_service.payments.get(payment_id)
+        if p is None or (tenant_id is not None and p.tenant_id != tenant_id):
+            continue
+        yield [p.id, p.order_id, p.tenant_id, to_decimal(p.amount_cents), p.method, p.status, p.created_at]
+
+
+def stock_rows(inventory_service: InventoryService) -> Iterator[list]:
+    """Yield one row per inventory item."""
+    for variant_id in list(inventory_service.items):
+        item = inventory_service.items.get(variant_id)
+        if item is None:
+            continue
+        yield [item.variant_id, item.name, item.stock, item.version, item.updated_at]
+
+
+def write_report(path: str, sheets: Dict[str, Tuple[List[str], Iterable[list]]],
+                 max_rows: int = EXCEL_MAX_ROWS) -> Dict[str, int]:
+    """
+    Stream several row sources into one workbook.
+
+    Parameters:
+      path (str): Output .xlsx path.
+      sheets (dict): {sheet title: (headers, row iterable)}.
+      max_rows (int): Data rows per sheet before continuing on "<title> (2)", ...
+
+    Returns {sheet title: total data rows written}.
+    """
+    wb = Workbook(write_only=True)
+    counts = {}
+    for title, (headers, rows) in sheets.items():
+        part = 1
+        ws = wb.create_sheet(title)
+        ws.append(headers)
+        written = 0
+        total = 0
+        for row in rows:
+            if written == max_rows:
+                part += 1
+                ws = wb.create_sheet(f"{title} ({part})")
+                ws.append(headers)
+                written = 0
+            ws.append(row)
+            written += 1
+            total += 1
+        counts[title] = total
+    wb.save(path)
+    return counts
+
+
+def export_merchant_report(filename: str, order_service: OrderService, payment_service: PaymentService,
+                           inventory_service: InventoryService, tenant_id: int = None) -> str:
+    """
+    Export orders, payments and stock into a timestamped .xlsx file.
+    Returns the file name.
+    """
+    xlsx_name = f"{filename}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
+    counts = write_report(xlsx_name, {
+        "Orders": (ORDER_HEADERS, order_rows(order_service, tenant_id)),
+        "Payments": (PAYMENT_HEADERS, payment_rows(payment_service, tenant_id)),
+        "Stock": (STOCK_HEADERS, stock_rows(inventory_service)),
+    })
+    print(f"[Excel Export] Saved {xlsx_name} ({', '.join(f'{k}: {v}' for k, v in counts.items())})")
+    return xlsx_name
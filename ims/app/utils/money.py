@@ -0,0 +1,69 @@
+"""
+app/utils/money.py
+Fixed-point money helpers.
+
+Amounts are stored as integer cents so that totals add up exactly and can be
+compared against payments without float drift. Conversion to and from
+decimal strings happens only at the API boundary.
+"""
+
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Iterable, Union
+
+CENT = Decimal("0.01")
+
+Amount = Union[int, float, str, Decimal]
+
+
+def to_cents(amount: Amount) -> int:
+    """
+    Convert a decimal amount (e.g. 99.9, "99.90", Decimal("99.9")) to integer cents.
+    Floats go through their shortest repr, so 0.1 becomes exactly 10 cents.
+    Rounds half up to the nearest cent.
+    """
+    if isinstance(amount, bool):
+        raise ValueError("Amount must be a number, not a bool.")
+    if isinstance(amount, float):
+        amount = repr(amount)
+    try:
+        value = Decimal(amount)
+    except ArithmeticError:
+        raise ValueError(f"Invalid amount: {amount!r}")
+    if not value.is_finite():
+        raise ValueError(f"Invalid amount: {amount!r}")
+    return int(value.quantize(CENT, rounding=ROUND_HALF_UP) * 100)
+
+
+def from_cents(cents: int) -> float:
+    """Convert integer cents to a float (for display and legacy callers)."""
+    return cents / 100
+
+
+def format_cents(cents: int) -> str:
+    """Format integer cents as an exact decimal string, e.g. 19980 -> '199.80'."""
+    sign = "-" if cents < 0 else ""
+    whole, frac = divmod(abs(cents), 100)
+    return f"{sign}{whole}.{frac:02d}"
+
+
+def sum_cents(values: Iterable[int]) -> int:
+    """Sum a batch of cent amounts. Integer addition is exact, so no rounding is needed."""
+    return sum(values)
+
+
+def line_totals_cents(quantities: Iterable[int], unit_prices_cents: Iterable[int]) -> int:
+    """
+    Total of many (qty, unit price) pairs in one pass.
+    Quantities must be integers so the result stays in exact integer cents.
+    """
+    total = 0
+    for qty, price in zip(quantities, unit_prices_cents):
+        if not isinstance(qty, int) or isinstance(qty, bool):
+            raise ValueError(f"Quantity must be an integer, got {qty!r}.")
+        total += qty * price
+    return total
+
+
+def to_decimal(cents: int) -> Decimal:
+    """Convert integer cents to an exact Decimal, e.g. 19980 -> Decimal('199.80')."""
+    return Decimal(cents).scaleb(-2)
@@ -0,0 +1,4 @@
+"""
+conftest.py
+Makes the `app` package importable when running pytest from the project root.
+"""
@@ -0,0 +1,93 @@
+"""
+tests/test_bulk_cancel.py
+Bulk order cancellation with single-pass stock restoration and refunds.
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.api.ims_api import IMSApi
+
+
+def make_api():
+    api = IMSApi()
+    api.add_stock(101, 10)
+    api.inventory_service.add_item(102, "Black Hoodie", initial_stock=10)
+    return api
+
+
+def order(api, tenant_id, qty=2):
+    return api.create_order(tenant_id, [
+        {"variant_id": 101, "qty": qty, "price": "1.10"},
+        {"variant_id": 102, "qty": 1, "price": 3},
+    ])["order_id"]
+
+
+def test_cancel_orders_ignores_repeated_ids():
+    api = make_api()
+    sub = api.subscribe_changes()
+    order_id = order(api, 1)
+
+    cancelled, restored = api.order_service.cancel_orders([order_id, order_id])
+
+    assert [o.id for o in cancelled] == [order_id]
+    assert restored == {101: 2, 102: 1}
+    assert api.inventory_service.get_stock(101) == 10
+    assert [e.kind for e in sub.poll()].count("order_cancelled") == 1
+    sub.close()
+
+
+def test_bulk_cancel_by_tenant_refunds_payments():
+    api = make_api()
+    first, second, other = order(api, 1), order(api, 1, qty=1), order(api, 2)
+    api.pay_order(1, first, "5.20")
+    api.pay_order(2, other, "5.20")
+
+    report = api.bulk_cancel_orders(tenant_id=1)
+
+    assert report["cancelled_order_ids"] == [first, second]
+    assert report["restored_stock"] == {101: 3, 102: 2}
+    assert report["refunded_payment_ids"] == [1]
+    assert report["refunded_total"] == "5.20"
+    assert api.order_service.get_order(other).status == "CREATED"
+    assert api.payment_service.get_payment(2).status == "COMPLETED"
+    assert api.inventory_service.get_stock(101) == 8
+
+
+def test_bulk_cancel_skips_orders_no_longer_created():
+    api = make_api()
+    first, second = order(api, 1), order(api, 1)
+    api.pay_order(1, first, "5.20")
+    api.pay_order(1, second, "5.20")
+
+    # Another caller cancels `second` between lookup and cancellation
+    find_orders = api.order_service.find_orders
+
+    def racing_find_orders(**filters):
+        found = find_orders(**filters)
+        api.order_service.get_order(second).status = "CANCELLED"
+        return found
+
+    api.order_service.find_orders = racing_find_orders
+    report = api.bulk_cancel_orders(tenant_id=1)
+
+    assert report["cancelled_order_ids"] == [first]
+    assert report["refunded_payment_ids"] == [1]
+    assert api.payment_service.get_payment(2).status == "COMPLETED"
+
+
+def test_bulk_cancel_by_time_window():
+    api = make_api()
+    old, new = order(api, 1), order(api, 2)
+    api.order_service.get_order(old).created_at -= timedelta(hours=2)
+
+    report = api.bulk_cancel_orders(start=datetime.now() - timedelta(hours=1))
+
+    assert report["cancelled_order_ids"] == [new]
+    assert api.order_service.get_order(old).status == "CREATED"
+
+
+def test_bulk_cancel_requires_a_filter():
+    with pytest.raises(ValueError):
+        make_api().bulk_cancel_orders()
@@ -0,0 +1,137 @@
+"""
+tests/test_change_feed.py
+Change-data-capture feed: tailing, drop/block policies and async delivery.
+"""
+
+import asyncio
+import gc
+import threading
+import time
+
+import pytest
+
+from app.api.ims_api import IMSApi
+from app.services.change_feed import ChangeFeed
+
+
+def test_tail_from_sequence_number():
+    feed = ChangeFeed()
+    for i in range(5):
+        feed.publish("tick", n=i)
+
+    with feed.subscribe(from_seq=2) as sub:
+        assert [e.seq for e in sub.poll()] == [3, 4, 5]
+        assert sub.poll() == []
+
+    with pytest.raises(ValueError):
+        feed.subscribe(from_seq=6)
+
+
+def test_tail_rejects_position_outside_retention():
+    feed = ChangeFeed(retention=3)
+    for i in range(5):
+        feed.publish("tick", n=i)
+    with pytest.raises(ValueError):
+        feed.subscribe(from_seq=0, max_lag=3)
+
+
+def test_drop_policy_skips_oldest_events():
+    feed = ChangeFeed()
+    with feed.subscribe(max_lag=2, policy="drop") as sub:
+        for i in range(5):
+            feed.publish("tick", n=i)
+        assert [e.seq for e in sub.poll()] == [4, 5]
+        assert sub.dropped == 3
+
+
+def test_block_policy_waits_for_consumer():
+    feed = ChangeFeed()
+    sub = feed.subscribe(max_lag=2, policy="block")
+
+    producer = threading.Thread(target=lambda: [feed.publish("tick", n=i) for i in range(6)])
+    producer.start()
+    received = []
+    while len(received) < 6:
+        received += sub.poll(timeout=1)
+    producer.join()
+    sub.close()
+
+    assert [e.seq for e in received] == [1, 2, 3, 4, 5, 6]
+    assert sub.dropped == 0
+
+
+def test_block_policy_times_out_instead_of_hanging():
+    feed = ChangeFeed(block_timeout=0.05)
+    with feed.subscribe(max_lag=2, policy="block") as sub:
+        for i in range(3):
+            feed.publish("tick", n=i)
+        assert sub.dropped == 1
+        assert [e.seq for e in sub.poll()] == [2, 3]
+
+
+def test_stalled_consumer_only_delays_first_publish():
+    feed = ChangeFeed(block_timeout=0.2)
+    with feed.subscribe(max_lag=1, policy="block") as sub:
+        feed.publish("tick")
+        started = time.perf_counter()
+        for i in range(5):
+            feed.publish("tick", n=i)
+        assert time.perf_counter() - started < 0.4
+        assert sub.stalled
+
+        # Catching up restores backpressure
+        assert [e.seq for e in sub.poll()] == [6]
+        assert not sub.stalled
+        feed.publish("tick")
+        started = time.perf_counter()
+        feed.publish("tick")
+        assert time.perf_counter() - started >= 0.2
+
+
+def test_blocked_publisher_does_not_hold_inventory_lock():
+    api = IMSApi()
+    api.change_feed.block_timeout = 2.0
+    sub = api.subscribe_changes(max_lag=1, policy="block")
+    api.add_stock(101, 1)
+
+    # This publish blocks on the slow consumer ...
+    blocked = threading.Thread(target=api.add_stock, args=(101, 1))
+    blocked.start()
+    time.sleep(0.1)
+
+    # ... but other stock writes still go through immediately
+    started = time.perf_counter()
+    api.inventory_service.adjust_stock(101, 1)
+    assert time.perf_counter() - started < 1.0
+    assert api.inventory_service.get_stock(101) == 3
+
+    received = []
+    while len(received) < 3:
+        received += sub.poll(timeout=1)
+    blocked.join()
+    sub.close()
+    assert [e.data["version"] for e in received] == [1, 2, 3]
+
+
+def test_forgotten_subscription_is_released():
+    feed = ChangeFeed()
+    feed.subscribe(max_lag=1, policy="block")
+    gc.collect()
+    assert len(feed.subscriptions) == 0
+    feed.publish("tick")
+    feed.publish("tick")
+
+
+def test_async_iterator_yields_batches():
+    api = IMSApi()
+    sub = api.subscribe_changes(from_seq=0)
+    api.add_stock(101, 5)
+    api.create_order(1, [{"variant_id": 101, "qty": 2, "price": 1.5}])
+
+    async def consume():
+        async for batch in sub:
+            sub.close()
+            return batch
+
+    batch = asyncio.run(consume())
+    assert [e.kind for e in batch] == ["stock_adjusted", "stock_adjusted", "order_created"]
@@ -0,0 +1,55 @@
+"""
+tests/test_excel_report.py
+Streaming .xlsx export: sheet splitting, tenant filtering, concurrent writes.
+"""
+
+import pytest
+
+openpyxl = pytest.importorskip("openpyxl")
+
+from app.api.ims_api import IMSApi
+from app.utils.excel_report import (
+    ORDER_HEADERS, PAYMENT_HEADERS, order_rows, payment_rows, write_report,
+)
+
+
+def make_api(orders_per_tenant=4):
+    api = IMSApi()
+    api.add_stock(101, 100)
+    for tenant_id in (1, 2):
+        for _ in range(orders_per_tenant):
+            result = api.create_order(tenant_id, [{"variant_id": 101, "qty": 1, "price": "1.10"}])
+            api.pay_order(tenant_id, result["order_id"], "1.10")
+    return api
+
+
+def test_sheets_split_at_max_rows(tmp_path):
+    api = make_api()
+    path = str(tmp_path / "report.xlsx")
+
+    counts = write_report(path, {"Orders": (ORDER_HEADERS, order_rows(api.order_service))}, max_rows=3)
+
+    assert counts == {"Orders": 8}
+    wb = openpyxl.load_workbook(path)
+    assert wb.sheetnames == ["Orders", "Orders (2)", "Orders (3)"]
+    assert [ws.max_row for ws in wb] == [4, 4, 3]
+    assert all(next(ws.values) == tuple(ORDER_HEADERS) for ws in wb)
+
+
+def test_tenant_filter(tmp_path):
+    api = make_api()
+    path = str(tmp_path / "report.xlsx")
+
+    write_report(path, {"Payments": (PAYMENT_HEADERS, payment_rows(api.payment_service, tenant_id=2))})
+
+    rows = list(openpyxl.load_workbook(path)["Payments"].values)[1:]
+    assert len(rows) == 4
+    assert {row[2] for row in rows} == {2}
+
+
+def test_orders_created_during_export_do_not_break_it():
+    api = make_api(orders_per_tenant=1)
+    rows = order_rows(api.order_service)
+    next(rows)
+    api.create_order(1, [{"variant_id": 101, "qty": 1, "price": 1}])
+    assert len(list(rows)) == 1
@@ -0,0 +1,80 @@
+"""
+tests/test_inventory_cas.py
+Versioned compare-and-set stock updates.
+"""
+
+import pytest
+
+from app.services.inventory_service import InventoryService
+
+
+def make_inventory():
+    inventory = InventoryService()
+    inventory.adjust_stock(101, 10)
+    inventory.add_item(102, "Black Hoodie", initial_stock=5)
+    return inventory
+
+
+def test_compare_and_set_rejects_stale_version():
+    inventory = make_inventory()
+    stock, version = inventory.get_stock_version(101)
+
+    assert inventory.compare_and_set_stock(101, version, 7)
+    assert not inventory.compare_and_set_stock(101, version, 3)
+    assert inventory.get_stock(101) == 7
+
+
+def test_adjust_if_version_conflict():
+    inventory = make_inventory()
+    _, version = inventory.get_stock_version(101)
+    inventory.adjust_stock(101, 1)
+
+    assert not inventory.adjust_if_version(101, version, -2)
+    assert inventory.get_stock(101) == 11
+
+
+def test_batch_is_all_or_nothing():
+    inventory = make_inventory()
+    _, v101 = inventory.get_stock_version(101)
+    _, v102 = inventory.get_stock_version(102)
+
+    # One stale version: nothing is written
+    result = inventory.adjust_many_if_versions([
+        {"variant_id": 101, "version": v101, "qty": -1},
+        {"variant_id": 102, "version": v102 - 1, "qty": -1},
+    ])
+    assert result is None
+    assert (inventory.get_stock(101), inventory.get_stock(102)) == (10, 5)
+
+    # One insufficient delta: nothing is written
+    with pytest.raises(ValueError):
+        inventory.adjust_many_if_versions([
+            {"variant_id": 101, "version": v101, "qty": -1},
+            {"variant_id": 102, "version": v102, "qty": -6},
+        ])
+    assert (inventory.get_stock(101), inventory.get_stock(102)) == (10, 5)
+
+    result = inventory.adjust_many_if_versions([
+        {"variant_id": 101, "version": v101, "qty": -1},
+        {"variant_id": 102, "version": v102, "qty": -2},
+    ])
+    assert result == {101: 9, 102: 3}
+
+
+def test_retry_returns_stock_written_by_this_call():
+    inventory = make_inventory()
+    assert inventory.adjust_many_with_retry({101: -4, 102: 1}) == {101: 6, 102: 6}
+
+
+def test_retry_gives_up_after_max_retries():
+    inventory = make_inventory()
+    real = inventory.adjust_many_if_versions
+
+    def always_conflicting(changes, reason="manual"):
+        inventory.adjust_stock(101, 1)  # Another writer bumps the version first
+        return real(changes, reason)
+
+    inventory.adjust_many_if_versions = always_conflicting
+    with pytest.raises(ValueError, match="conflicted 3 times"):
+        inventory.adjust_many_with_retry({101: -1}, max_retries=3)
+    assert inventory.get_stock(101) == 13
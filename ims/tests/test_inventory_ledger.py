@@ -0,0 +1,90 @@
+"""
+tests/test_inventory_ledger.py
+Point-in-time stock ledger: as-of lookups, checkpoints and compaction.
+"""
+
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.services.inventory_ledger import InventoryLedger
+from app.services.inventory_service import InventoryService
+
+START = datetime(2026, 1, 1)
+
+
+def build_history(movements: int, checkpoint_interval: int = 8, seed: int = 7):
+    """Record random movements one minute apart; return the ledger and true stock per minute."""
+    rng = random.Random(seed)
+    ledger = InventoryLedger(checkpoint_interval=checkpoint_interval)
+    ledger.open(101, 5, START)
+    stock, truth = 5, []
+    for i in range(movements):
+        delta = max(rng.randint(-3, 5), -stock)
+        stock += delta
+        at = START + timedelta(minutes=i + 1)
+        ledger.record(101, delta, "manual", at)
+        truth.append((at, stock))
+    return ledger, truth
+
+
+def test_as_of_across_checkpoints():
+    ledger, truth = build_history(200)
+    assert ledger.stock_as_of(101, START - timedelta(days=1)) == 0
+    assert ledger.stock_as_of(101, START) == 5
+    for at, stock in truth:
+        assert ledger.stock_as_of(101, at) == stock
+        assert ledger.stock_as_of(101, at + timedelta(seconds=30)) == stock
+
+
+def test_as_of_after_compaction():
+    ledger, truth = build_history(200)
+    cutoff = truth[99][0] + timedelta(seconds=1)
+
+    assert ledger.compact(cutoff) == 100
+    assert len(ledger.movements(101)) == 100
+    for at, stock in truth[99:]:
+        assert ledger.stock_as_of(101, at) == stock
+    # Compacting again is a no-op
+    assert ledger.compact(cutoff) == 0
+
+
+def test_clock_stepping_backwards_keeps_history_sorted():
+    ledger = InventoryLedger(checkpoint_interval=2)
+    ledger.open(101, 0, START)
+    ledger.record(101, 5, "receive", START + timedelta(hours=2))
+    ledger.record(101, -1, "order", START + timedelta(hours=1))  # Clock stepped back
+    ledger.record(101, 3, "receive", START + timedelta(hours=3))
+
+    times = list(ledger.variants[101].times)
+    assert times == sorted(times)
+    assert list(ledger.variants[101].cp_times) == sorted(ledger.variants[101].cp_times)
+    assert ledger.stock_as_of(101, START + timedelta(hours=2)) == 4
+    assert ledger.stock_as_of(101, START + timedelta(hours=3)) == 7
+
+
+def test_movements_keep_reasons():
+    inventory = InventoryService()
+    inventory.adjust_stock(101, 10, reason="receive")
+    inventory.adjust_stock(101, -2, reason="order")
+    assert [(m["delta"], m["reason"]) for m in inventory.get_movements(101)] == [
+        (10, "receive"), (-2, "order")
+    ]
+    with pytest.raises(ValueError):
+        inventory.adjust_stock(101, 1, reason="gift")
+
+
+def test_non_integer_quantity_is_rejected_before_any_write():
+    inventory = InventoryService()
+    inventory.adjust_stock(101, 10)
+    ledger = inventory.ledger.variants[101]
+
+    with pytest.raises(ValueError):
+        inventory.adjust_stock(101, 2.0)
+    with pytest.raises(ValueError):
+        inventory.adjust_many_with_retry({101: -2.0})
+
+    assert inventory.get_stock(101) == 10
+    assert len(ledger.times) == len(ledger.deltas) == len(ledger.reasons) == 1
+    assert inventory.get_stock_as_of(101, datetime.now()) == 10
@@ -0,0 +1,60 @@
+"""
+tests/test_money.py
+Integer-cents money helpers.
+"""
+
+from decimal import Decimal
+
+import pytest
+
+from app.services.payment_service import Payment
+from app.utils.money import to_cents, format_cents, from_cents, line_totals_cents, to_decimal
+
+
+def test_to_cents_is_exact_for_floats_and_strings():
+    assert to_cents(0.1) == 10
+    assert to_cents(99.9) == 9990
+    assert to_cents("199.80") == 19980
+    assert to_cents(Decimal("0.07")) == 7
+    assert to_cents(3) == 300
+
+
+def test_to_cents_rounds_half_up():
+    assert to_cents("1.005") == 101
+    assert to_cents(1.005) == 101
+    assert to_cents("1.004") == 100
+    assert to_cents("-1.005") == -101
+
+
+def test_to_cents_rejects_bad_input():
+    for bad in ("abc", "", "NaN", "Infinity", True):
+        with pytest.raises(ValueError):
+            to_cents(bad)
+
+
+def test_format_cents():
+    assert format_cents(19980) == "199.80"
+    assert format_cents(5) == "0.05"
+    assert format_cents(0) == "0.00"
+    assert format_cents(-5) == "-0.05"
+    assert format_cents(-12345) == "-123.45"
+
+
+def test_round_trip_through_string():
+    for cents in (0, 1, 99, 100, 19999, -250):
+        assert to_cents(format_cents(cents)) == cents
+    assert to_decimal(19980) == Decimal("199.80")
+    assert from_cents(1999) == 19.99
+
+
+def test_line_totals_require_integer_quantities():
+    assert line_totals_cents([2, 3], [9990, 100]) == 20280
+    assert line_totals_cents([], []) == 0
+    with pytest.raises(ValueError):
+        line_totals_cents([2.0], [150])
+
+
+def test_payment_converts_decimal_amounts():
+    assert Payment(1, 1, 1, 19.99, "cash").amount_cents == 1999
+    assert Payment(1, 1, 1, "0.10", "cash").amount_cents == 10
+    assert Payment.from_cents(1, 1, 1, 1999, "cash").amount == 19.99
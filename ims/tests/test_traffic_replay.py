@@ -0,0 +1,103 @@
+"""
+tests/test_traffic_replay.py
+Record-and-replay of IMSApi traffic.
+"""
+
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.api.ims_api import IMSApi
+from app.api.traffic_replay import TrafficRecorder, TrafficReplayer
+
+
+def record_session(path):
+    recorder = TrafficRecorder(path)
+    api = IMSApi(recorder=recorder)
+    api.add_stock(101, 50)
+    for _ in range(5):
+        order_id = api.create_order(1, [{"variant_id": 101, "qty": 2, "price": "2.50"}])["order_id"]
+        api.pay_order(1, order_id, "5.00")
+    with pytest.raises(ValueError):
+        api.reduce_stock(101, 1000)
+    api.stock_as_of(101, datetime.now())
+    api.renew_subscription(1, "yearly")
+    recorder.close(api)
+    return recorder, api
+
+
+@pytest.mark.parametrize("name", ["trace.jsonl", "trace.jsonl.gz"])
+def test_record_and_replay_round_trip(tmp_path, name):
+    recorder, _ = record_session(str(tmp_path / name))
+    assert recorder.calls == 14
+
+    replayer = TrafficReplayer(str(tmp_path / name))
+    report = replayer.replay()
+
+    assert report["calls"] == 14
+    assert report["state_matches"] is True
+    assert report["aggregates_match"] is True
+    assert report["error_mismatches"] == []
+    for key in ("mean_ms", "p50_ms", "p95_ms", "throughput"):
+        assert key in report["recorded"] and key in report["replayed"] and key in report["delta"]
+    assert [c["t"] for c in replayer.calls] == sorted(c["t"] for c in replayer.calls)
+
+
+@pytest.mark.parametrize("speed", [None, 1.0])
+def test_windowed_bulk_cancel_round_trip(tmp_path, speed):
+    path = str(tmp_path / "trace.jsonl.gz")
+    recorder = TrafficRecorder(path)
+    api = IMSApi(recorder=recorder)
+    api.add_stock(101, 10)
+    window_start = datetime.now()
+    time.sleep(0.02)
+    api.create_order(1, [{"variant_id": 101, "qty": 2, "price": 1}])
+    time.sleep(0.02)
+    report = api.bulk_cancel_orders(start=window_start, end=datetime.now())
+    assert report["cancelled_order_ids"] == [1]
+    recorder.close(api)
+
+    replayed = TrafficReplayer(path).replay(speed=speed)
+    assert replayed["state_matches"] is True
+    assert replayed["aggregates_match"] is True
+
+    # A window entirely before the recorded orders still matches nothing
+    recorder = TrafficRecorder(path)
+    api = IMSApi(recorder=recorder)
+    api.add_stock(101, 10)
+    api.create_order(1, [{"variant_id": 101, "qty": 2, "price": 1}])
+    api.bulk_cancel_orders(end=datetime.now() - timedelta(hours=1))
+    recorder.close(api)
+    assert TrafficReplayer(path).replay(speed=speed)["state_matches"] is True
+
+
+def test_concurrent_replay_reports_no_exact_state(tmp_path):
+    path = str(tmp_path / "trace.jsonl")
+    record_session(path)
+    report = TrafficReplayer(path).replay(concurrency=4)
+    assert report["state_matches"] is None
+    assert report["aggregates_match"] in (True, False)
+
+
+def test_closed_recorder_does_not_affect_api(tmp_path):
+    _, api = record_session(str(tmp_path / "trace.jsonl"))
+    assert api.add_stock(101, 1)["new_qty"] == 41
+    assert api.recorder is None
+
+
+def test_unrecordable_arguments_do_not_change_results(tmp_path):
+    recorder = TrafficRecorder(str(tmp_path / "trace.jsonl"))
+    api = IMSApi(recorder=recorder)
+    api.add_stock(101, 10)
+
+    # A frozenset is not JSON-serializable: the call still returns normally ...
+    result = api.create_order(frozenset({1}), [{"variant_id": 101, "qty": 1, "price": 1}])
+    assert result["order_id"] == 1
+    # ... and a failing call still raises its own exception
+    with pytest.raises(ValueError, match="Unsupported plan"):
+        api.renew_subscription(1, plan=frozenset({"weekly"}))
+
+    assert recorder.failed == 2
+    assert recorder.calls == 1
+    recorder.close()